@@ -7,77 +7,314 @@ Tienda Aurelion - Consultor de Documentación (CLI)
   1) Listar documentos detectados (.md y .png)
   2) Ver índice (TOC) por encabezados de un .md
   3) Leer un documento con paginación
-  4) Buscar texto en todos los .md (muestra coincidencias con contexto)
+  4) Buscar texto en todos los .md (muestra coincidencias con contexto;
+     varios términos separados por |)
   5) Ver resumen de sugerencias (si existe 4.Sugerencias_Copilot.md)
+  6) Recargar inventario de documentos
   0) Salir
 """
 
+import atexit
+import json
+import mmap
 import os
 import sys
 import re
+import tempfile
 import textwrap
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
 from shutil import get_terminal_size
-from typing import List, Dict, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 MD_EXT = {".md", ".markdown"}
 IMG_EXT = {".png", ".jpg", ".jpeg", ".gif", ".svg"}
-
-
-def ask_int(prompt: str, valid: List[int]) -> int:
+# A partir de este tamaño (bytes) read_text usa mmap en vez de os.read
+MMAP_THRESHOLD = 512 * 1024
+# Aviso cuando un archivo del inventario ya no se puede leer
+UNAVAILABLE_MSG = "Archivo no disponible: {}. Use 6) Recargar documentos."
+# Encabezado Markdown: hasta 6 '#', espacio y título no vacío (por línea)
+HEADING_RE = re.compile(r"^[^\S\n]*(#{1,6})[^\S\n]+(\S.*)$", re.MULTILINE)
+
+
+class CachedFile(NamedTuple):
+    """Contenido de un archivo ya procesado, válido para (mtime_ns, size)."""
+    mtime_ns: int
+    size: int
+    lines: List[str]
+    toc: List[Tuple[int, str, int]]
+    joined: str           # líneas unidas con "\n" (los offsets coinciden con `lines`)
+    nls: List[int]        # posiciones de cada "\n" en `joined`
+    lower: str            # `joined` en minúsculas, para búsquedas sin distinguir mayúsculas
+    lower_nls: List[int]  # posiciones de cada "\n" en `lower`
+
+
+# Caché en memoria: ruta -> CachedFile
+_FILE_CACHE: Dict[str, CachedFile] = {}
+
+# Caché en disco de TOCs entre ejecuciones: ruta absoluta -> [mtime_ns, tamaño, toc]
+# Subir la versión si cambian las reglas de build_toc: invalida los TOCs guardados
+TOC_CACHE_VERSION = 1
+TOC_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "aurelion_toc.json",
+)
+_TOC_DISK: Dict[str, list] = {}
+_toc_dirty = False
+
+
+def ask_int(prompt: str, valid: Iterable[int]) -> int:
     """Pide un entero del conjunto válido."""
+    valid_set = valid if isinstance(valid, (set, frozenset)) else frozenset(valid)
     while True:
         val = input(prompt).strip()
-        if val.isdigit() and int(val) in valid:
-            return int(val)
-        print(f"Opción inválida. Opciones válidas: {valid}")
+        try:
+            num = int(val)
+        except ValueError:
+            num = None
+        if num in valid_set:
+            return num
+        print(f"Opción inválida. Opciones válidas: {sorted(valid_set)}")
 
 
 def clear():
     """Limpia pantalla si es posible."""
     try:
-        os.system("cls" if os.name == "nt" else "clear")
+        if os.name == "nt" and not os.environ.get("WT_SESSION"):
+            # Consola clásica de Windows: puede no interpretar secuencias ANSI
+            os.system("cls")
+        else:
+            # Secuencia ANSI directa: sin lanzar un proceso por cada redibujado
+            sys.stdout.write("\x1b[H\x1b[2J")
+            sys.stdout.flush()
     except Exception:
         pass
 
 
 def read_text(path: str) -> str:
     """Lee archivo de texto en UTF-8 con fallback."""
-    with open(path, "r", encoding="utf-8", errors="replace") as f:
-        return f.read()
+    # Lectura directa del tamaño conocido y un solo decode (sin capa de texto)
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size = os.fstat(fd).st_size
+        if size > MMAP_THRESHOLD:
+            # Archivo grande: se decodifica directo de la página del kernel,
+            # sin copia intermedia a un objeto bytes
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as mv:
+                text = str(mv, "utf-8", "replace")
+        else:
+            chunks = [os.read(fd, max(size, 1))]
+            while chunks[-1]:
+                chunks.append(os.read(fd, 65536))
+            text = b"".join(chunks).decode("utf-8", errors="replace")
+    finally:
+        os.close(fd)
+    # Mismos saltos de línea que el modo texto (universal newlines)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def cached_read(path: str) -> CachedFile:
+    """
+    Lee archivo usando la caché en memoria.
+    Solo vuelve a leer del disco si cambió su mtime o su tamaño.
+    Si el archivo ya no está disponible, lo quita de la caché y propaga OSError.
+    """
+    try:
+        st = os.stat(path)
+        entry = _FILE_CACHE.get(path)
+        if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+            return entry
+        text = read_text(path)
+    except OSError:
+        _FILE_CACHE.pop(path, None)
+        raise
+    lines = text.splitlines()
+    # Solo se guarda `joined`: el texto original sería una copia más del archivo
+    joined = "\n".join(lines)
+    toc = cached_toc(path, st, joined)
+    nls = newline_offsets(joined)
+    # Minúsculas una sola vez por versión del archivo, no en cada búsqueda.
+    # Si nada cambia (o cambian solo letras) se comparten texto u offsets.
+    lower = joined.lower()
+    if lower == joined:
+        lower = joined
+    lower_nls = nls if len(lower) == len(joined) else newline_offsets(lower)
+    entry = CachedFile(
+        st.st_mtime_ns, st.st_size, lines, toc, joined, nls, lower, lower_nls
+    )
+    _FILE_CACHE[path] = entry
+    return entry
+
+
+def cached_toc(path: str, st: os.stat_result, joined: str) -> List[Tuple[int, str, int]]:
+    """TOC guardado en disco si el archivo no cambió; si no, lo recalcula."""
+    global _toc_dirty
+    key = os.path.abspath(path)
+    saved = _TOC_DISK.get(key)
+    if isinstance(saved, list) and len(saved) == 3 and saved[:2] == [st.st_mtime_ns, st.st_size]:
+        try:
+            return [(int(level), str(title), int(line)) for level, title, line in saved[2]]
+        except (TypeError, ValueError, IndexError):
+            pass  # Entrada corrupta: se recalcula
+    toc = build_toc(joined, normalized=True)
+    _TOC_DISK[key] = [st.st_mtime_ns, st.st_size, toc]
+    _toc_dirty = True
+    return toc
+
+
+def load_toc_cache(path: str = TOC_CACHE_PATH) -> None:
+    """Carga los TOCs guardados en ejecuciones anteriores (si existen)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if not isinstance(data, dict) or data.get("version") != TOC_CACHE_VERSION:
+        return
+    tocs = data.get("tocs")
+    if isinstance(tocs, dict):
+        # Solo entradas con la forma [mtime_ns, tamaño, toc]; el resto se ignora
+        _TOC_DISK.update(
+            (k, v) for k, v in tocs.items() if isinstance(v, list) and len(v) == 3
+        )
+
+
+def save_toc_cache(path: str = TOC_CACHE_PATH) -> None:
+    """Guarda los TOCs en disco si hubo cambios (escritura atómica)."""
+    global _toc_dirty
+    if not _toc_dirty:
+        return
+    # Sin las rutas que ya no existen, para que el archivo no crezca sin límite
+    tocs = {k: v for k, v in _TOC_DISK.items() if os.path.exists(k)}
+    folder = os.path.dirname(path)
+    tmp = None
+    try:
+        os.makedirs(folder, exist_ok=True)
+        # Temporal con nombre único: dos instancias abiertas no se pisan.
+        # Con ensure_ascii (por defecto) las rutas no UTF-8 se guardan escapadas
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=folder, suffix=".tmp", delete=False
+        ) as f:
+            tmp = f.name
+            json.dump({"version": TOC_CACHE_VERSION, "tocs": tocs}, f)
+        os.replace(tmp, path)
+        _toc_dirty = False
+    except (OSError, ValueError):
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+def _preload_one(path: str) -> None:
+    """Carga un archivo en la caché; si no se puede leer, se avisa al usarlo."""
+    try:
+        cached_read(path)
+    except OSError:
+        pass
+
+
+def preload_files(paths: List[str]) -> None:
+    """Carga en la caché, en paralelo, los archivos que falten o hayan cambiado."""
+    if len(paths) < 2:
+        for p in paths:
+            _preload_one(p)
+        return
+    # Las lecturas liberan el GIL: se solapan las esperas de E/S entre archivos
+    with ThreadPoolExecutor(max_workers=min(8, len(paths))) as ex:
+        list(ex.map(_preload_one, paths))
 
 
 def list_files(root: str) -> Tuple[List[str], List[str]]:
     """Devuelve listas (mds, imgs) en la carpeta."""
     mds, imgs = [], []
-    for name in sorted(os.listdir(root)):
-        p = os.path.join(root, name)
-        if not os.path.isfile(p):
+    with os.scandir(root) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        # is_file() reutiliza el tipo devuelto por scandir (sin stat extra)
+        if not entry.is_file():
             continue
-        ext = os.path.splitext(name)[1].lower()
+        base, dot, ext = entry.name.rpartition(".")
+        # Igual que splitext: nombres tipo ".md" no tienen extensión
+        if not dot or not base.lstrip("."):
+            continue
+        ext = dot + ext.lower()
         if ext in MD_EXT:
-            mds.append(p)
+            mds.append(entry.path)
         elif ext in IMG_EXT:
-            imgs.append(p)
+            imgs.append(entry.path)
     return mds, imgs
 
 
-def build_toc(md_text: str) -> List[Tuple[int, str, int]]:
+def index_by_name(paths: List[str]) -> Dict[str, str]:
+    """Índice nombre de archivo en minúsculas -> ruta (en el orden de `paths`)."""
+    index: Dict[str, str] = {}
+    for p in paths:
+        index.setdefault(os.path.basename(p).lower(), p)
+    return index
+
+
+def find_by_prefix(index: Dict[str, str], prefix: str) -> Optional[str]:
+    """Primera ruta cuyo nombre (en minúsculas) empieza con `prefix`, o None."""
+    prefix = prefix.lower()
+    return next((p for name, p in index.items() if name.startswith(prefix)), None)
+
+
+def build_toc(md_text: str, normalized: bool = False) -> List[Tuple[int, str, int]]:
     """
     Extrae TOC de encabezados Markdown.
     Retorna lista de tuplas (nivel, texto, línea).
+    Con normalized=True, md_text ya viene unido con "\n" desde splitlines().
     """
     toc = []
-    for i, line in enumerate(md_text.splitlines(), start=1):
-        m = re.match(r"^(#{1,6})\s+(.*)", line.strip())
-        if m:
-            level = len(m.group(1))
-            title = m.group(2).strip()
-            toc.append((level, title, i))
+    if "#" not in md_text:
+        return toc
+    # Un solo recorrido del patrón sobre todo el texto (no un regex por línea)
+    text = md_text if normalized else "\n".join(md_text.splitlines())
+    line, last = 1, 0
+    for m in HEADING_RE.finditer(text):
+        line += text.count("\n", last, m.start())
+        last = m.start()
+        level = len(m.group(1))
+        title = m.group(2).strip()
+        toc.append((level, title, line))
     return toc
 
 
-def paginate(text: str, title: str = "", width: int = 0, height: int = 0):
-    """Muestra texto paginado según tamaño de terminal."""
+def soft_wrap(line: str, width: int) -> Iterator[str]:
+    """Corta una línea en trozos de hasta `width` columnas, de preferencia en espacios."""
+    if "\t" in line:
+        line = line.expandtabs()
+    n = len(line)
+    if n <= width:
+        yield line
+        return
+    width = max(1, width)
+    i = 0
+    while i < n:
+        j = min(i + width, n)
+        if j < n:
+            # Último espacio dentro del ancho (incluye el que cae justo en el borde)
+            k = line.rfind(" ", i, j + 1)
+            if k > i:
+                j = k
+        yield line[i:j]
+        i = j + 1 if j < n and line[j] == " " else j
+
+
+def wrap_stream(lines: Iterable[str], width: int) -> Iterator[str]:
+    """Genera las líneas ya envueltas al ancho dado, una a una."""
+    for line in lines:
+        yield from soft_wrap(line, width)
+
+
+def paginate(lines: List[str], title: str = "", width: int = 0, height: int = 0):
+    """Muestra líneas de texto paginadas según tamaño de terminal."""
     if width <= 0 or height <= 0:
         cols, rows = get_terminal_size(fallback=(100, 30))
     else:
@@ -85,43 +322,137 @@ def paginate(text: str, title: str = "", width: int = 0, height: int = 0):
 
     # Reservamos 3 líneas para encabezado/ayuda
     rows = max(10, rows - 3)
-    lines = []
-    for raw_line in text.splitlines():
-        wrapped = textwrap.wrap(raw_line, width=cols) or [""]
-        lines.extend(wrapped)
+    if all(len(line) <= cols and "\t" not in line for line in lines):
+        # Caso común: todo cabe en el ancho, se pagina la lista tal cual
+        stream: Iterator[str] = iter(lines)
+    else:
+        # Se envuelve a demanda: solo vive en memoria la página actual
+        stream = wrap_stream(lines, cols)
 
-    total = len(lines)
-    idx = 0
-    while idx < total:
+    header = f"{title}\n" + "-" * (len(title) + 2) + "\n" if title else ""
+    page = list(islice(stream, rows))
+    while page:
         clear()
-        if title:
-            print(f"{title}\n" + "-" * (len(title) + 2))
-        end = min(idx + rows, total)
-        for i in range(idx, end):
-            print(lines[i])
-        idx = end
-        if idx < total:
+        # Una sola escritura (y un flush) por página en vez de un print por línea
+        sys.stdout.write(header + "\n".join(page) + "\n")
+        sys.stdout.flush()
+        page = list(islice(stream, rows))
+        if page:
             input("\n⏎ Enter para continuar, Ctrl+C para salir…")
 
 
-def search_all(md_paths: List[str], query: str, context: int = 1) -> List[Tuple[str, int, str]]:
-    """Busca en todos los .md y retorna (archivo, linea, fragmento)."""
+def newline_offsets(text: str) -> List[int]:
+    """Posiciones de cada salto de línea en el texto."""
+    offsets = []
+    pos = text.find("\n")
+    while pos != -1:
+        offsets.append(pos)
+        pos = text.find("\n", pos + 1)
+    return offsets
+
+
+def search_file(
+    path: str,
+    needle: Union[str, "re.Pattern[str]"],
+    context: int,
+    case_sensitive: bool,
+    highlight: Callable[[str], str],
+) -> List[Tuple[str, int, str]]:
+    """
+    Busca `needle` en un .md y retorna (archivo, linea, fragmento).
+    `needle` es un texto o un patrón compilado (varios términos).
+    Sin case_sensitive, debe venir ya en minúsculas.
+    """
+    results: List[Tuple[str, int, str]] = []
+    try:
+        entry = cached_read(path)
+    except OSError:
+        return results  # Archivo borrado o ilegible: se omite de la búsqueda
+    body, nls = entry.joined, entry.nls
+    n_lines = len(entry.lines)
+    # 1ª pasada: búsqueda de subcadena sobre todo el archivo de una vez
+    if case_sensitive:
+        hay, nl_offsets = body, nls
+    else:
+        hay, nl_offsets = entry.lower, entry.lower_nls
+    if isinstance(needle, str):
+        def find(start: int) -> int:
+            return hay.find(needle, start)
+    else:
+        def find(start: int) -> int:
+            m = needle.search(hay, start)
+            return m.start() if m else -1
+
+    pos = find(0)
+    if pos == -1:
+        return results
+    # 2ª pasada: contexto y resaltado solo en las líneas con coincidencia.
+    # Las coincidencias avanzan en orden: cada bisect parte de la línea anterior
+    idx = 0
+    while pos != -1:
+        idx = bisect_right(nl_offsets, pos, idx)
+        i = idx + 1
+        # Tomar contexto: un solo corte del texto, de inicio de `start` a fin de `end`
+        start = max(1, i - context)
+        end = min(n_lines, i + context)
+        lo = nls[start - 2] + 1 if start > 1 else 0
+        hi = nls[end - 1] if end <= len(nls) else len(body)
+        snippet = body[lo:hi]
+        results.append((path, i, highlight(snippet)))
+        # Una entrada por línea: seguir desde la línea siguiente
+        if idx >= len(nl_offsets):
+            break
+        pos = find(nl_offsets[idx] + 1)
+    return results
+
+
+def search_all(
+    md_paths: List[str], query: str, context: int = 1, case_sensitive: bool = False
+) -> List[Tuple[str, int, str]]:
+    """
+    Busca en todos los .md y retorna (archivo, linea, fragmento).
+    Con case_sensitive=True distingue mayúsculas/minúsculas.
+    Varios términos separados por "|" se buscan a la vez (cualquiera).
+    """
     query_low = query.lower()
     results: List[Tuple[str, int, str]] = []
+    terms = [t for t in (t.strip() for t in query.split("|")) if t]
+    needle: Union[str, "re.Pattern[str]"]
+    if len(terms) > 1:
+        # Un solo patrón con todas las alternativas: una pasada por archivo.
+        # Los términos largos primero para resaltar "abc" antes que "ab".
+        terms.sort(key=len, reverse=True)
+        alts = terms if case_sensitive else [t.lower() for t in terms]
+        needle = re.compile("|".join(map(re.escape, alts)))
+        pat = re.compile("|".join(map(re.escape, terms)), 0 if case_sensitive else re.IGNORECASE)
+
+        def highlight(snippet: str) -> str:
+            return pat.sub(lambda m: f"[{m.group(0)}]", snippet)
+    # Resaltado: si no hay diferencia de mayúsculas basta str.replace;
+    # si no, se compila el patrón una sola vez para todas las coincidencias
+    elif case_sensitive or query_low == query.upper():
+        needle = query if case_sensitive else query_low
+        marked = f"[{query}]"
+
+        def highlight(snippet: str) -> str:
+            return snippet.replace(query, marked)
+    else:
+        needle = query_low
+        pat = re.compile(re.escape(query), re.IGNORECASE)
+
+        def highlight(snippet: str) -> str:
+            return pat.sub(lambda m: f"[{m.group(0)}]", snippet)
+
+    search = partial(
+        search_file,
+        needle=needle,
+        context=context,
+        case_sensitive=case_sensitive,
+        highlight=highlight,
+    )
+    # En serie: find/search retienen el GIL, repartir entre hilos no acelera
     for p in md_paths:
-        text = read_text(p)
-        lines = text.splitlines()
-        for i, line in enumerate(lines, start=1):
-            if query_low in line.lower():
-                # Tomar contexto
-                start = max(1, i - context)
-                end = min(len(lines), i + context)
-                snippet = "\n".join(lines[start-1:end])
-                # Resaltar simple
-                snippet = re.sub(
-                    re.escape(query), lambda m: f"[{m.group(0)}]", snippet, flags=re.IGNORECASE
-                )
-                results.append((p, i, snippet))
+        results.extend(search(p))
     return results
 
 
@@ -133,13 +464,16 @@ def pick_from_list(items: List[str], title: str) -> int:
     print(title)
     for i, p in enumerate(items, start=1):
         print(f"  {i}) {os.path.basename(p)}")
-    return ask_int("Elija número: ", list(range(1, len(items) + 1))) - 1
+    return ask_int("Elija número: ", range(1, len(items) + 1)) - 1
 
 
 def show_toc(md_path: str):
     """Muestra TOC de un .md con líneas destino."""
-    text = read_text(md_path)
-    toc = build_toc(text)
+    try:
+        toc = cached_read(md_path).toc
+    except OSError:
+        print(UNAVAILABLE_MSG.format(os.path.basename(md_path)))
+        return
     print(f"\n📚 Índice de {os.path.basename(md_path)}")
     if not toc:
         print("  (No se detectaron encabezados Markdown)")
@@ -151,8 +485,13 @@ def show_toc(md_path: str):
 
 def open_doc_paged(md_path: str):
     """Abre documento paginado."""
-    text = read_text(md_path)
-    paginate(text, title=os.path.basename(md_path))
+    try:
+        lines = cached_read(md_path).lines
+    except OSError:
+        print(UNAVAILABLE_MSG.format(os.path.basename(md_path)))
+        input("\n⏎ Enter para continuar…")
+        return
+    paginate(lines, title=os.path.basename(md_path))
 
 
 def main():
@@ -161,6 +500,15 @@ def main():
         print(f"Carpeta no válida: {root}")
         sys.exit(1)
 
+    # TOCs de ejecuciones previas; se guardan al salir
+    load_toc_cache()
+    atexit.register(save_toc_cache)
+
+    # Inventario inicial; se refresca al listar (1) o recargar (6)
+    md_paths, img_paths = list_files(root)
+    preload_files(md_paths)
+    by_name = index_by_name(md_paths)
+
     while True:
         clear()
         print("===== TIENDA AURELION - CONSULTOR DE DOCUMENTACIÓN =====")
@@ -170,12 +518,16 @@ def main():
         print("3) Leer un .md con paginación")
         print("4) Buscar texto en todos los .md")
         print("5) Resumen de sugerencias")
+        print("6) Recargar documentos")
         print("0) Salir")
 
-        op = ask_int("\nElija opción: ", [0, 1, 2, 3, 4, 5])
+        op = ask_int("\nElija opción: ", [0, 1, 2, 3, 4, 5, 6])
 
-        # Cargar inventario cada vuelta (por si agregaste/quitas archivos)
-        md_paths, img_paths = list_files(root)
+        # Recargar inventario solo cuando se pide (por si agregaste/quitas archivos)
+        if op in (1, 6):
+            md_paths, img_paths = list_files(root)
+            preload_files(md_paths)
+            by_name = index_by_name(md_paths)
 
         if op == 0:
             print("Aduiós.")
@@ -219,12 +571,13 @@ def main():
                 print("No hay .md para buscar.")
                 input("\n⏎ Enter para continuar…")
                 continue
-            q = input("Texto a buscar (mín. 2 caracteres): ").strip()
+            q = input("Texto a buscar (mín. 2 caracteres; varios términos con |): ").strip()
             if len(q) < 2:
                 print("Consulta demasiado corta.")
                 input("\n⏎ Enter para continuar…")
                 continue
-            results = search_all(md_paths, q, context=1)
+            cs = input("¿Distinguir mayúsculas/minúsculas? (s/N): ").strip().lower() == "s"
+            results = search_all(md_paths, q, context=1, case_sensitive=cs)
             clear()
             print(f"Resultados para '{q}': {len(results)}\n")
             for p, line, snip in results[:200]:  # límite de seguridad
@@ -238,11 +591,16 @@ def main():
         elif op == 5:
             clear()
             # Abrimos si existe el archivo con ese nombre o similar
-            cand = [p for p in md_paths if os.path.basename(p).lower().startswith("4.sugerencias")]
-            if not cand:
+            sug = find_by_prefix(by_name, "4.sugerencias")
+            if sug is None:
                 print("No se encontró el archivo de sugerencias (ej. 4.Sugerencias_Copilot.md).")
             else:
-                open_doc_paged(cand[0])
+                open_doc_paged(sug)
+
+        elif op == 6:
+            clear()
+            print(f"🔄 Inventario recargado: {len(md_paths)} .md, {len(img_paths)} imágenes.")
+            input("\n⏎ Enter para continuar…")
 
         else:
             pass